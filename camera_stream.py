@@ -11,22 +11,29 @@ Access the stream at:
     - http://<jetson-ip>:8080/ (web interface with AI analysis)
     - http://<jetson-ip>:8080/video_feed (raw MJPEG stream)
     - http://<jetson-ip>:8080/analysis (AI analysis JSON)
+    - http://<jetson-ip>:8080/shm (shared memory frame info, with --shm)
 """
 
 import argparse
 import base64
+import ctypes
+import fcntl
 import glob
 import json
 import os
+import queue
 import re
 import socket
-import subprocess
+import struct
 import threading
 import time
+from collections import deque
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from multiprocessing import shared_memory
 from socketserver import ThreadingMixIn
 
 import cv2
+import numpy as np
 
 # Try to import requests, provide helpful error if missing
 try:
@@ -36,6 +43,19 @@ except ImportError:
     print("Install it with: pip3 install requests")
     exit(1)
 
+# Optional: simplejpeg calls libjpeg-turbo's SIMD codec directly,
+# which is faster than going through cv2.imencode/imdecode
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+# Optional: pybase64 has SIMD base64, used for images sent to Ollama
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
 # AI Analysis Configuration
 AI_CONFIG = {
     'model': 'qwen3-vl:2b',
@@ -43,14 +63,50 @@ AI_CONFIG = {
     'analysis_interval': 5.0,  # seconds between analyses
     'timeout': 60.0,  # request timeout (vision models can be slow)
     'prompt': 'Describe what you see in this image concisely. List the main objects and any notable activity.',
-    'jpeg_quality': 70,  # Lower quality for faster encoding
+    'jpeg_quality': 50,  # Lower quality for faster encoding and a smaller payload
+    'max_image_size': 768,  # long side in pixels; the model sees small tiles anyway
     'enabled_by_default': True,
 }
 
+# qwen3-vl may include <think>...</think> blocks in its response
+THINK_BLOCK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
 # Global variables for frame sharing between threads
-output_frame = None
-lock = threading.Lock()
+# Single-slot exchange of the latest JPEG: deque append/index are atomic
+# under the GIL, so readers can take the latest frame without any locking
+latest_jpeg = deque(maxlen=1)
+frame_cv = threading.Condition()  # Notified on every new frame
+frame_seq = 0  # Number of frames published, advanced under frame_cv
+# For BGR cameras the stream JPEG is re-encoded at an adaptive quality, so
+# the AI thread asks the capture thread for a copy of the next raw frame
+bgr_request = threading.Event()
+latest_bgr = deque(maxlen=1)
 camera = None
+shared_frame = None  # SharedFrameBuffer when --shm is enabled
+
+# Negotiated camera settings, cached when the camera is opened
+camera_info = {}
+status_bytes = None  # Prebuilt /status response for the open camera
+NO_CAMERA_STATUS = json.dumps({'status': 'no camera'}).encode()
+
+# One single-slot queue per connected /video_feed client. The capture
+# thread drops a client's unsent frame rather than waiting for it.
+stream_subscribers = set()
+subscribers_lock = threading.Lock()
+
+# Per-part MJPEG header; Content-Length lets clients read the JPEG without
+# scanning for the next boundary
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+
+# Seconds between frame retrievals when nobody is watching the stream
+# (keeps a reasonably fresh frame around for the AI thread)
+IDLE_RETRIEVE_INTERVAL = 1.0
+
+# JPEG quality for frames the server has to encode itself. Lowered
+# temporarily (down to the minimum) while encoding can't keep up with the
+# frame rate, and raised back once it can.
+STREAM_JPEG_QUALITY = 80
+STREAM_JPEG_MIN_QUALITY = 40
 
 # AI Analysis state
 analysis_result = {
@@ -61,8 +117,16 @@ analysis_result = {
     'frame_count': 0
 }
 analysis_lock = threading.Lock()
+analysis_bytes = None  # Prebuilt /analysis response, rebuilt on every change
 ai_enabled = True
 
+# Only the AI thread talks to Ollama, so one session keeps a single
+# keep-alive connection open across analyses
+ollama_session = requests.Session()
+
+# Minimum seconds between partial description updates while streaming
+PARTIAL_ANALYSIS_INTERVAL = 0.25
+
 
 class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     """Handle requests in a separate thread."""
@@ -70,19 +134,102 @@ class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     daemon_threads = True
 
 
+class SharedFrameBuffer:
+    """
+    Latest BGR frames in shared memory, so other processes on the Jetson can
+    read frames without opening the camera or going through HTTP.
+
+    Layout: a 64-byte header (uint64 seq, uint32 width, height, stride, slots)
+    followed by `slots` frames of height * stride bytes each. The latest frame
+    is in slot seq % slots (seq 0 means no frame yet). The capture thread only
+    writes the slot after it, so readers can use the latest slot in place
+    without copying; the frame is intact as long as seq has advanced by less
+    than slots - 1 when the reader is done with it. Attach with
+    SharedMemory(name=...) using the name reported by /shm.
+    """
+    HEADER = struct.Struct('<QIIII')
+    SEQ = struct.Struct('<Q')
+    HEADER_SIZE = 64
+    # Triple buffered: one slot being written, the latest frame, and the
+    # previous one, which gives readers a full frame period to finish with it
+    SLOTS = 3
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.stride = width * 3
+        self.slot_size = self.stride * height
+        self.seq = 0
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=self.HEADER_SIZE + self.SLOTS * self.slot_size)
+        self.slots = [
+            np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.shm.buf,
+                       offset=self.HEADER_SIZE + i * self.slot_size)
+            for i in range(self.SLOTS)
+        ]
+        self.HEADER.pack_into(self.shm.buf, 0, self.seq, self.width, self.height,
+                              self.stride, self.SLOTS)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def back_buffer(self):
+        """Return the slot the next frame should be written into."""
+        return self.slots[(self.seq + 1) % self.SLOTS]
+
+    def write(self, frame):
+        """
+        Publish a frame, copying it into the back buffer unless it was captured
+        there directly. Frames of a different size are skipped.
+        """
+        back = self.back_buffer()
+        if frame is None or frame.shape != back.shape:
+            return
+        if frame is not back:
+            np.copyto(back, frame)
+        self.seq += 1
+        self.SEQ.pack_into(self.shm.buf, 0, self.seq)
+
+    def close(self):
+        """Release and unlink the shared memory block."""
+        self.slots = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Capture thread still holds a frame view; unmapped at exit
+        self.shm.unlink()
+
+
 class StreamHandler(BaseHTTPRequestHandler):
     """HTTP request handler for video streaming."""
 
+    # HTTP/1.1 so the page's /status and /analysis polls reuse one
+    # keep-alive connection. Every response other than /video_feed
+    # carries a Content-Length for that.
+    protocol_version = 'HTTP/1.1'
+
+    # Socket timeout in seconds. A viewer that can't accept data for this
+    # long is dropped instead of pinning its handler thread in write()
+    timeout = 10
+
+    def setup(self):
+        """Tune the client socket for streaming."""
+        super().setup()
+        # Each frame is a single write, so send it right away instead of
+        # letting Nagle hold back the tail of the frame
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # 1 MB absorbs short network hiccups without blocking the handler,
+        # and caps kernel autotuning so a slow client can't queue seconds of video
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
 
     def do_GET(self):
         if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.get_html_page().encode())
+            self.send_body(HTML_PAGE, 'text/html; charset=utf-8')
         elif self.path == '/video_feed':
             self.send_response(200)
             self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
@@ -92,89 +239,101 @@ class StreamHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.stream_video()
         elif self.path == '/status':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            status = self.get_status()
-            self.wfile.write(status.encode())
+            self.send_json(self.get_status())
         elif self.path == '/analysis':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(self.get_analysis().encode())
+            self.send_json(self.get_analysis())
         elif self.path == '/toggle_ai':
             self.handle_toggle_ai()
+        elif self.path == '/shm':
+            self.send_json(self.get_shm_info().encode())
         else:
             self.send_error(404)
 
+    def send_body(self, body, content_type):
+        """Send a complete 200 response with a Content-Length."""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, body):
+        """Send pre-serialized JSON bytes, readable from other origins."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
     def stream_video(self):
         """Stream MJPEG video to the client."""
-        global output_frame, lock
-        while True:
-            with lock:
-                if output_frame is None:
-                    time.sleep(0.01)
-                    continue
-                frame = output_frame.copy()
+        global latest_jpeg, stream_subscribers
+        frames = queue.Queue(maxsize=1)
+        if latest_jpeg:
+            # Start with the current frame instead of waiting for the next one
+            frames.put_nowait(mjpeg_part(latest_jpeg[-1]))
+        with subscribers_lock:
+            stream_subscribers.add(frames)
 
-            # Encode frame as JPEG
-            ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            if not ret:
-                continue
+        try:
+            while True:
+                try:
+                    part = frames.get(timeout=1.0)
+                except queue.Empty:
+                    continue
 
-            try:
-                self.wfile.write(b'--frame\r\n')
-                self.wfile.write(b'Content-Type: image/jpeg\r\n\r\n')
-                self.wfile.write(jpeg.tobytes())
-                self.wfile.write(b'\r\n')
-            except (BrokenPipeError, ConnectionResetError):
-                break
+                try:
+                    # One write (and one send syscall) per frame
+                    self.wfile.write(part)
+                except (BrokenPipeError, ConnectionResetError, socket.timeout):
+                    break
+        finally:
+            with subscribers_lock:
+                stream_subscribers.discard(frames)
+            # The stream has no length, so the connection can't be reused
+            self.close_connection = True
 
     def get_status(self):
-        """Return camera status as JSON."""
-        global camera
+        """Return camera status as JSON bytes."""
+        global camera, status_bytes
         if camera is not None and camera.isOpened():
-            width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = camera.get(cv2.CAP_PROP_FPS)
-            return json.dumps({
-                'status': 'running',
-                'width': width,
-                'height': height,
-                'fps': fps
-            })
-        return json.dumps({'status': 'no camera'})
+            return status_bytes
+        return NO_CAMERA_STATUS
 
     def get_analysis(self):
-        """Return AI analysis results as JSON."""
-        global analysis_result, analysis_lock, ai_enabled
-        with analysis_lock:
-            return json.dumps({
-                'enabled': ai_enabled,
-                'description': analysis_result['description'],
-                'timestamp': analysis_result['timestamp'],
-                'processing_time': analysis_result['processing_time'],
-                'error': analysis_result['error'],
-                'frame_count': analysis_result['frame_count'],
-                'model': AI_CONFIG['model']
-            })
+        """Return AI analysis results as JSON bytes."""
+        global analysis_bytes
+        return analysis_bytes
+
+    def get_shm_info(self):
+        """Return shared memory frame buffer details as JSON."""
+        global shared_frame
+        if shared_frame is None:
+            return json.dumps({'enabled': False})
+        return json.dumps({
+            'enabled': True,
+            'name': shared_frame.name,
+            'width': shared_frame.width,
+            'height': shared_frame.height,
+            'stride': shared_frame.stride,
+            'slots': shared_frame.SLOTS,
+            'slot_size': shared_frame.slot_size,
+            'header_size': shared_frame.HEADER_SIZE,
+            'seq': shared_frame.seq
+        })
 
     def handle_toggle_ai(self):
         """Toggle AI analysis on/off."""
         global ai_enabled
         ai_enabled = not ai_enabled
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps({'ai_enabled': ai_enabled}).encode())
+        update_analysis()
+        self.send_json(json.dumps({'ai_enabled': ai_enabled}).encode())
         print(f"[AI] Analysis {'enabled' if ai_enabled else 'disabled'}")
 
-    def get_html_page(self):
-        """Return the HTML page for the web interface."""
-        return '''<!DOCTYPE html>
+
+# Web interface, encoded once at import
+HTML_PAGE = '''<!DOCTYPE html>
 <html>
 <head>
     <title>Jetson Vision Stream</title>
@@ -509,19 +668,53 @@ class StreamHandler(BaseHTTPRequestHandler):
         updateAnalysis();
     </script>
 </body>
-</html>'''
+</html>'''.encode('utf-8')
+
+
+# V4L2 capability query (see linux/videodev2.h)
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_STREAMING = 0x04000000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
 
 
-def get_video_device_info(device_path):
-    """Get information about a video device using v4l2-ctl."""
+class V4L2Capability(ctypes.Structure):
+    """struct v4l2_capability"""
+    _fields_ = [
+        ('driver', ctypes.c_char * 16),
+        ('card', ctypes.c_char * 32),
+        ('bus_info', ctypes.c_char * 32),
+        ('version', ctypes.c_uint32),
+        ('capabilities', ctypes.c_uint32),
+        ('device_caps', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 3),
+    ]
+
+
+VIDIOC_QUERYCAP = 0x80685600  # _IOR('V', 0, struct v4l2_capability)
+
+
+def query_device_caps(device_path):
+    """
+    Return the V4L2 capability bits of a device node, or None if unavailable.
+    A single ioctl, so no capture session or USB bandwidth is set up.
+    """
     try:
-        result = subprocess.run(
-            ['v4l2-ctl', '-d', device_path, '--all'],
-            capture_output=True, text=True, timeout=5
-        )
-        return result.stdout
-    except Exception:
-        return ""
+        fd = os.open(device_path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return None
+
+    caps = V4L2Capability()
+    try:
+        fcntl.ioctl(fd, VIDIOC_QUERYCAP, caps)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    # device_caps describes this node; capabilities covers the whole device
+    if caps.capabilities & V4L2_CAP_DEVICE_CAPS:
+        return caps.device_caps
+    return caps.capabilities
 
 
 def find_capture_device():
@@ -530,14 +723,22 @@ def find_capture_device():
     Logitech BRIO and similar cameras create multiple /dev/video* devices.
     We need to find the one that actually captures video frames.
     """
-    video_devices = sorted(glob.glob('/dev/video*'))
+    # Sort numerically so /dev/video10 is probed after /dev/video2
+    video_devices = sorted(glob.glob('/dev/video[0-9]*'), key=lambda p: int(p.rsplit('video', 1)[1]))
 
     print("Scanning video devices...")
 
     for device in video_devices:
-        device_num = int(device.replace('/dev/video', ''))
         print(f"  Testing {device}...", end=" ", flush=True)
 
+        # Skip metadata-only nodes (e.g. the BRIO's second /dev/video*)
+        # before paying for an OpenCV open and test read
+        caps = query_device_caps(device)
+        required = V4L2_CAP_VIDEO_CAPTURE | V4L2_CAP_STREAMING
+        if caps is not None and (caps & required) != required:
+            print("not a capture device")
+            continue
+
         # Try to open with V4L2 backend explicitly
         cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
 
@@ -563,17 +764,77 @@ def find_capture_device():
     return None
 
 
-def open_camera(device, width, height, fps):
-    """Open camera with proper settings for Jetson + USB camera."""
-    print(f"\nOpening camera: {device}")
+def is_jpeg_buffer(frame):
+    """Check whether a captured frame is a raw JPEG buffer rather than a BGR image."""
+    return frame.ndim <= 2 and frame.size > 2 and frame.reshape(-1)[:2].tobytes() == b'\xff\xd8'
 
-    # Use V4L2 backend explicitly (not GStreamer)
-    cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
 
-    if not cap.isOpened():
-        print(f"Error: Could not open {device}")
+def encode_jpeg(frame, quality):
+    """Encode a BGR frame to JPEG bytes, using simplejpeg when available."""
+    if simplejpeg is not None:
+        # simplejpeg defaults to 4:4:4; match cv2.imencode's smaller 4:2:0
+        return simplejpeg.encode_jpeg(np.ascontiguousarray(frame), quality=quality,
+                                      colorspace='BGR', colorsubsampling='420', fastdct=True)
+
+    ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ret:
         return None
+    return jpeg.tobytes()
 
+
+# cv2.imread flags for decoding a JPEG at 1/2, 1/4 or 1/8 scale
+JPEG_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def jpeg_scale_factor(width, height, min_size):
+    """Largest JPEG decode scale factor that keeps the long side at least min_size."""
+    long_side = max(width, height)
+    for factor in (8, 4, 2):
+        if long_side // factor >= min_size:
+            return factor
+    return 1
+
+
+def decode_jpeg(jpeg, factor=1):
+    """
+    Decode JPEG bytes (or a uint8 array) to a BGR frame, or None if corrupt.
+    A factor of 2, 4 or 8 downscales during the DCT, which is much cheaper
+    than decoding at full size and resizing afterwards.
+    """
+    data = np.frombuffer(jpeg, dtype=np.uint8)
+    if simplejpeg is not None:
+        try:
+            size = {}
+            if factor > 1:
+                height, width = simplejpeg.decode_jpeg_header(data)[:2]
+                size = {'min_height': -(-height // factor), 'min_width': -(-width // factor)}
+            return simplejpeg.decode_jpeg(data, colorspace='BGR', fastdct=True,
+                                          fastupsample=True, **size)
+        except ValueError:
+            return None
+
+    return cv2.imdecode(data, JPEG_REDUCED_FLAGS[factor])
+
+
+def nvjpeg_pipeline(device, width, height, fps, quality=80):
+    """Build a GStreamer pipeline that JPEG-encodes raw camera frames on the NVJPG engine."""
+    framerate = f",framerate={fps}/1" if fps > 0 else ""
+    return (
+        f"v4l2src device={device} io-mode=2 ! "
+        f"video/x-raw,width={width},height={height}{framerate} ! "
+        "nvvidconv ! video/x-raw(memory:NVMM),format=I420 ! "
+        f"nvjpegenc quality={quality} ! "
+        "appsink drop=true max-buffers=1 sync=false"
+    )
+
+
+def configure_v4l2_capture(cap, width, height, fps):
+    """Apply format, resolution and buffering settings to a V4L2 capture."""
     # Set MJPEG format - much better for USB bandwidth
     fourcc = cv2.VideoWriter_fourcc('M', 'J', 'P', 'G')
     cap.set(cv2.CAP_PROP_FOURCC, fourcc)
@@ -589,31 +850,90 @@ def open_camera(device, width, height, fps):
     # Set buffer size to 1 for low latency
     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
-    # Verify settings
-    actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # Ask for the camera's compressed MJPEG buffers instead of decoded BGR
+    # frames, so they can be streamed without a decode/re-encode round trip
+    cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+
+def open_camera(device, width, height, fps, hw_encode=False):
+    """Open camera with proper settings for Jetson + USB camera."""
+    global status_bytes
+
+    print(f"\nOpening camera: {device}")
+
+    if hw_encode:
+        # Capture raw frames and JPEG-encode them on the Jetson's NVJPG engine
+        pipeline = nvjpeg_pipeline(device, width, height, fps, STREAM_JPEG_QUALITY)
+        cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+    else:
+        # Use V4L2 backend explicitly (not GStreamer)
+        cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+
+    if not cap.isOpened():
+        print(f"Error: Could not open {device}")
+        if hw_encode:
+            print("Check that OpenCV has GStreamer support, or run without --nvjpeg")
+        return None
+
+    if not hw_encode:
+        configure_v4l2_capture(cap, width, height, fps)
+
+    # Verify settings (GStreamer may not report a size until the first frame)
+    actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or width
+    actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height
     actual_fps = cap.get(cv2.CAP_PROP_FPS)
-    actual_fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
-    fourcc_str = "".join([chr((actual_fourcc >> 8 * i) & 0xFF) for i in range(4)])
+    if hw_encode:
+        fourcc_str = "JPEG (nvjpegenc)"
+    else:
+        # Some backends report the FOURCC as a negative or oversized double
+        actual_fourcc = int(cap.get(cv2.CAP_PROP_FOURCC)) & 0xFFFFFFFF
+        fourcc_str = actual_fourcc.to_bytes(4, 'little').decode('ascii', 'replace')
 
     print(f"Camera settings: {actual_width}x{actual_height} @ {actual_fps:.1f} FPS, format: {fourcc_str}")
 
     # Test read
     ret, frame = cap.read()
+    passthrough = ret and frame is not None and is_jpeg_buffer(frame)
+    if not passthrough:
+        # Backend or pixel format can't hand out JPEG bytes, fall back to BGR
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        ret, frame = cap.read()
+
     if not ret or frame is None:
         print("Error: Camera opened but cannot read frames")
         cap.release()
         return None
 
-    print(f"Test frame captured: {frame.shape[1]}x{frame.shape[0]}")
+    if passthrough:
+        print(f"Test frame captured: {frame.size} bytes (MJPEG passthrough)")
+    else:
+        print(f"Test frame captured: {frame.shape[1]}x{frame.shape[0]}")
+        if not hw_encode:
+            print("Camera is not delivering MJPEG, frames will be JPEG-encoded on the CPU "
+                  "(use --nvjpeg to encode on the Jetson's hardware encoder)")
+
+    camera_info.update({
+        'width': actual_width,
+        'height': actual_height,
+        'fps': actual_fps,
+        'fourcc': fourcc_str,
+        'passthrough': passthrough,
+    })
+    status_bytes = json.dumps({
+        'status': 'running',
+        'width': actual_width,
+        'height': actual_height,
+        'fps': actual_fps
+    }).encode()
     return cap
 
 
-def capture_frames(device, width, height, fps):
+def capture_frames(device, width, height, fps, max_encode_fps=0, share_memory=False,
+                   hw_encode=False):
     """Capture frames from the camera in a background thread."""
-    global output_frame, lock, camera
+    global camera, shared_frame
 
-    camera = open_camera(device, width, height, fps)
+    camera = open_camera(device, width, height, fps, hw_encode)
 
     if camera is None:
         print("\nFailed to open camera!")
@@ -625,47 +945,194 @@ def capture_frames(device, width, height, fps):
         print("5. Try a different device: python3 camera_stream.py --device /dev/video2")
         return
 
+    if share_memory:
+        shared_frame = SharedFrameBuffer(camera_info['width'], camera_info['height'])
+        print(f"Sharing frames in shared memory: {shared_frame.name}")
+
     print("\nCamera ready! Starting capture loop...")
 
+    # Frames are always grabbed so the driver queue stays fresh, but only
+    # retrieved (decoded/copied) as often as someone will actually use them
+    stream_interval = 1.0 / max_encode_fps if max_encode_fps > 0 else 0.0
+    last_retrieve = 0.0
+
+    # BGR frames are decoded into the same array every time instead of
+    # allocating a new one per frame (unused for passthrough JPEGs)
+    capture_buf = None
+
+    # Per-frame encode budget for adaptive quality
+    target_fps = camera_info['fps'] or fps or 30
+    if max_encode_fps > 0:
+        target_fps = min(target_fps, max_encode_fps)
+    frame_period = 1.0 / target_fps
+    jpeg_quality = STREAM_JPEG_QUALITY
+    encode_time = 0.0  # Exponential moving average, seconds
+
     consecutive_failures = 0
     while True:
-        ret, frame = camera.read()
-
-        if not ret or frame is None:
+        if not camera.grab():
             consecutive_failures += 1
             if consecutive_failures > 30:
                 print("Too many consecutive frame failures, trying to reopen camera...")
                 camera.release()
                 time.sleep(1)
-                camera = open_camera(device, width, height, fps)
+                camera = open_camera(device, width, height, fps, hw_encode)
                 if camera is None:
                     print("Failed to reopen camera")
                     return
+                capture_buf = None
                 consecutive_failures = 0
             time.sleep(0.01)
             continue
 
         consecutive_failures = 0
 
-        with lock:
-            output_frame = frame
+        if stream_subscribers or shared_frame is not None:
+            interval = stream_interval
+        else:
+            interval = IDLE_RETRIEVE_INTERVAL
+        now = time.monotonic()
+        if now - last_retrieve < interval:
+            continue
+        last_retrieve = now
+
+        if shared_frame is not None and not camera_info['passthrough']:
+            # Decode straight into the shared memory back buffer
+            ret, frame = camera.retrieve(shared_frame.back_buffer())
+        else:
+            ret, frame = camera.retrieve(capture_buf)
+            if ret and frame is not None and not camera_info['passthrough']:
+                capture_buf = frame
+        if not ret or frame is None:
+            continue
+
+        if shared_frame is not None:
+            # Shared memory readers need BGR, so passthrough frames get decoded here
+            if camera_info['passthrough']:
+                decoded = decode_jpeg(frame)
+                if decoded is not None:
+                    shared_frame.write(decoded)
+            else:
+                shared_frame.write(frame)
+
+        if camera_info['passthrough']:
+            # Frame is already a JPEG from the camera, forward it verbatim
+            buf = frame.tobytes()
+        else:
+            if bgr_request.is_set():
+                bgr_request.clear()
+                with frame_cv:
+                    latest_bgr.append(frame.copy())
+                    frame_cv.notify_all()
+
+            # Encode once here so streaming clients share the same JPEG bytes
+            encode_start = time.perf_counter()
+            buf = encode_jpeg(frame, jpeg_quality)
+            if buf is None:
+                continue
+
+            # Trade quality for speed while encoding eats most of the frame budget
+            encode_time = 0.9 * encode_time + 0.1 * (time.perf_counter() - encode_start)
+            if encode_time > 0.8 * frame_period:
+                jpeg_quality = max(STREAM_JPEG_MIN_QUALITY, jpeg_quality - 5)
+            elif encode_time < 0.4 * frame_period:
+                jpeg_quality = min(STREAM_JPEG_QUALITY, jpeg_quality + 5)
+
+        publish_frame(buf)
+
+
+def mjpeg_part(jpeg):
+    """Frame a JPEG as one part of the multipart MJPEG stream."""
+    return MJPEG_PART_HEADER % len(jpeg) + jpeg + b'\r\n'
+
+
+def publish_frame(jpeg):
+    """Publish a new frame and wake up every thread waiting for one."""
+    global latest_jpeg, frame_seq, stream_subscribers
+    with frame_cv:
+        latest_jpeg.append(jpeg)
+        frame_seq += 1
+        frame_cv.notify_all()
+
+    with subscribers_lock:
+        subscribers = list(stream_subscribers)
+    if not subscribers:
+        return
+
+    # Framed once here rather than once per client
+    part = mjpeg_part(jpeg)
+    for frames in subscribers:
+        try:
+            frames.put_nowait(part)
+        except queue.Full:
+            # Client hasn't sent the previous frame yet: replace it with the
+            # newest one instead of blocking the capture thread
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                pass
+            frames.put_nowait(part)
+
+
+def get_latest_frame(min_size=0):
+    """
+    Return the latest frame as a BGR image. Camera-native and hardware
+    encoded JPEGs are decoded from the shared JPEG, at a reduced scale with
+    min_size as long as the long side stays at least min_size pixels.
+    BGR cameras hand over a raw frame instead.
+    """
+    global latest_jpeg
+    if not latest_jpeg:
+        return None
+
+    if not camera_info['passthrough']:
+        # The stream JPEG may be down to STREAM_JPEG_MIN_QUALITY under load,
+        # and re-encoding it for the model would compress it twice
+        latest_bgr.clear()
+        bgr_request.set()
+        with frame_cv:
+            if not frame_cv.wait_for(lambda: latest_bgr, timeout=2 * IDLE_RETRIEVE_INTERVAL):
+                return None
+            return latest_bgr.pop()
+
+    factor = 1
+    if min_size and camera_info.get('width'):
+        factor = jpeg_scale_factor(camera_info['width'], camera_info['height'], min_size)
+    return decode_jpeg(latest_jpeg[-1], factor)
+
+
+def clean_response(text):
+    """Strip think blocks (including one still in progress) and blank lines from model output."""
+    if '<think>' in text:
+        text = THINK_BLOCK_RE.sub('', text).split('<think>', 1)[0]
+    return '\n'.join(filter(None, (line.strip() for line in text.splitlines())))
+
+
+def update_analysis(**changes):
+    """Apply changes to analysis_result and rebuild the /analysis response."""
+    global analysis_result, analysis_bytes
+    with analysis_lock:
+        analysis_result.update(changes)
+        analysis_bytes = json.dumps({
+            'enabled': ai_enabled,
+            **analysis_result,
+            'model': AI_CONFIG['model']
+        }).encode()
 
 
 def ai_analysis_loop():
     """Run continuous AI analysis on captured frames."""
-    global output_frame, lock, analysis_result, analysis_lock, ai_enabled
+    global latest_jpeg, ai_enabled
 
     frame_count = 0
     consecutive_errors = 0
+    analyzed_seq = 0
 
     print("[AI] Analysis thread started")
 
     # Wait for camera to be ready
-    while True:
-        with lock:
-            if output_frame is not None:
-                break
-        time.sleep(0.5)
+    with frame_cv:
+        frame_cv.wait_for(lambda: latest_jpeg)
 
     print("[AI] Camera ready, starting analysis loop")
     print(f"[AI] Model: {AI_CONFIG['model']}")
@@ -677,87 +1144,113 @@ def ai_analysis_loop():
             time.sleep(1.0)
             continue
 
+        # Never analyze the same frame twice: if the camera has stalled,
+        # wait for it here instead of resubmitting a stale frame
+        with frame_cv:
+            if not frame_cv.wait_for(lambda: frame_seq != analyzed_seq, timeout=1.0):
+                continue
+            analyzed_seq = frame_seq
+
         start_time = time.time()
 
         try:
-            # Copy current frame (thread-safe)
-            with lock:
-                if output_frame is None:
-                    time.sleep(0.5)
-                    continue
-                frame = output_frame.copy()
+            # Get current frame (thread-safe), decoded from the shared JPEG
+            # at the smallest scale that still covers the resize target
+            frame = get_latest_frame(AI_CONFIG['max_image_size'])
+            if frame is None:
+                time.sleep(0.5)
+                continue
 
             # Resize frame for faster processing (optional optimization)
-            # Smaller images = faster base64 encoding and API transfer
+            # Smaller images = faster base64 encoding, API transfer, and
+            # fewer vision tokens for the model to process
             h, w = frame.shape[:2]
-            if w > 1280:
-                scale = 1280 / w
-                frame = cv2.resize(frame, (1280, int(h * scale)))
+            max_size = AI_CONFIG['max_image_size']
+            if max(h, w) > max_size:
+                scale = max_size / max(h, w)
+                frame = cv2.resize(frame, (int(w * scale), int(h * scale)),
+                                   interpolation=cv2.INTER_AREA)
 
             # Encode frame to JPEG, then base64
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, AI_CONFIG['jpeg_quality']]
-            ret, buffer = cv2.imencode('.jpg', frame, encode_params)
-            if not ret:
+            buffer = encode_jpeg(frame, AI_CONFIG['jpeg_quality'])
+            if buffer is None:
                 raise Exception("Failed to encode frame")
 
-            img_base64 = base64.b64encode(buffer).decode('utf-8')
+            if pybase64 is not None:
+                img_base64 = pybase64.b64encode_as_string(buffer)
+            else:
+                img_base64 = base64.b64encode(buffer).decode('ascii')
 
-            # Call Ollama API
-            response = requests.post(
+            # A new analysis is starting; don't show the last one's error
+            # next to the text streaming in
+            update_analysis(error=None)
+
+            # Call Ollama API, streaming the response so the web UI shows the
+            # description while it is still being generated
+            with ollama_session.post(
                 AI_CONFIG['ollama_url'],
                 json={
                     'model': AI_CONFIG['model'],
                     'prompt': AI_CONFIG['prompt'],
                     'images': [img_base64],
-                    'stream': False
+                    'stream': True
                 },
+                stream=True,
                 timeout=AI_CONFIG['timeout']
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Ollama API error: {response.status_code} - {response.text[:100]}")
-
-            result_data = response.json()
-            result_text = result_data.get('response', 'No response from model')
-
-            # Clean up the response (remove thinking tokens if present)
-            # qwen3-vl may include <think>...</think> blocks
-            result_text = re.sub(r'<think>.*?</think>', '', result_text, flags=re.DOTALL).strip()
-
-            # Remove any leading/trailing whitespace and normalize newlines
-            result_text = '\n'.join(line.strip() for line in result_text.split('\n') if line.strip())
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Ollama API error: {response.status_code} - {response.text[:100]}")
+
+                parts = []
+                last_partial = 0.0
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise Exception(f"Ollama API error: {chunk['error'][:100]}")
+                    parts.append(chunk.get('response', ''))
+                    if chunk.get('done'):
+                        break
+
+                    now = time.time()
+                    if now - last_partial >= PARTIAL_ANALYSIS_INTERVAL:
+                        partial_text = clean_response(''.join(parts))
+                        if partial_text:
+                            update_analysis(description=partial_text)
+                            last_partial = now
+
+            result_text = clean_response(''.join(parts)) or 'No response from model'
 
             processing_time = time.time() - start_time
             frame_count += 1
             consecutive_errors = 0
 
             # Update result (thread-safe)
-            with analysis_lock:
-                analysis_result['description'] = result_text
-                analysis_result['timestamp'] = time.strftime('%H:%M:%S')
-                analysis_result['processing_time'] = round(processing_time, 2)
-                analysis_result['error'] = None
-                analysis_result['frame_count'] = frame_count
+            update_analysis(
+                description=result_text,
+                timestamp=time.strftime('%H:%M:%S'),
+                processing_time=round(processing_time, 2),
+                error=None,
+                frame_count=frame_count
+            )
 
             print(f"[AI] Analysis #{frame_count} completed in {processing_time:.2f}s")
 
         except requests.exceptions.Timeout:
             consecutive_errors += 1
-            with analysis_lock:
-                analysis_result['error'] = 'Analysis timeout - model may be overloaded'
+            update_analysis(error='Analysis timeout - model may be overloaded')
             print(f"[AI] Timeout (consecutive errors: {consecutive_errors})")
 
         except requests.exceptions.ConnectionError:
             consecutive_errors += 1
-            with analysis_lock:
-                analysis_result['error'] = 'Cannot connect to Ollama - is it running? (ollama serve)'
+            update_analysis(error='Cannot connect to Ollama - is it running? (ollama serve)')
             print(f"[AI] Connection error - is Ollama running? (consecutive errors: {consecutive_errors})")
 
         except Exception as e:
             consecutive_errors += 1
             error_msg = str(e)[:150]
-            with analysis_lock:
-                analysis_result['error'] = f'Analysis error: {error_msg}'
+            update_analysis(error=f'Analysis error: {error_msg}')
             print(f"[AI] Error: {e}")
 
         # Adaptive backoff on errors
@@ -771,6 +1264,33 @@ def ai_analysis_loop():
             time.sleep(sleep_time)
 
 
+def pin_current_thread(name, cores, priority=None):
+    """Pin the calling thread to a set of CPU cores and optionally renice it (Linux)."""
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError as e:
+        print(f"Could not pin {name} thread: {e}")
+        return
+
+    message = f"Pinned {name} thread to CPU {','.join(map(str, sorted(cores)))}"
+    if priority is not None:
+        try:
+            # On Linux the nice value is per thread, addressed by its native id
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), priority)
+            message += f" (nice {priority})"
+        except OSError:
+            message += " (raising priority needs CAP_SYS_NICE)"
+    print(message)
+
+
+def pinned(target, name, cores, priority=None):
+    """Wrap a thread target so the thread pins itself before running."""
+    def run(*args):
+        pin_current_thread(name, cores, priority)
+        target(*args)
+    return run
+
+
 def get_local_ip():
     """Get the local IP address of this machine."""
     try:
@@ -793,6 +1313,14 @@ def main():
     parser.add_argument('--width', type=int, default=1280, help='Frame width (default: 1280)')
     parser.add_argument('--height', type=int, default=720, help='Frame height (default: 720)')
     parser.add_argument('--fps', type=int, default=30, help='Target FPS (default: 30)')
+    parser.add_argument('--max-encode-fps', type=float, default=0,
+                        help='Max frames per second prepared for streaming (default: 0 = camera rate)')
+    parser.add_argument('--nvjpeg', action='store_true',
+                        help='Capture raw frames and JPEG-encode them on the Jetson NVJPG engine (GStreamer)')
+    parser.add_argument('--shm', action='store_true',
+                        help='Share the latest BGR frame with other processes via shared memory')
+    parser.add_argument('--pin-cores', action='store_true',
+                        help='Pin capture, AI and HTTP threads to separate CPU cores')
 
     # AI-specific arguments
     parser.add_argument('--ai-interval', type=float, default=5.0,
@@ -815,6 +1343,11 @@ def main():
     if args.ai_prompt:
         AI_CONFIG['prompt'] = args.ai_prompt
     ai_enabled = not args.no_ai
+    update_analysis()
+
+    # Jetson's OpenCV has no usable OpenCL device, so T-API (UMat) calls only
+    # add dispatch and host copies. Frames are passed through as JPEG anyway.
+    cv2.ocl.setUseOpenCL(False)
 
     # Determine device
     if args.device:
@@ -833,10 +1366,24 @@ def main():
             return
         print(f"\nAuto-detected capture device: {device}")
 
+    # Optionally give capture and AI a core each and the HTTP server the rest,
+    # so a busy AI thread can't delay USB frame reads
+    capture_target, ai_target = capture_frames, ai_analysis_loop
+    server_cores = None
+    if args.pin_cores:
+        cores = sorted(os.sched_getaffinity(0))
+        if len(cores) >= 3:
+            capture_target = pinned(capture_frames, 'capture', {cores[0]}, priority=-5)
+            ai_target = pinned(ai_analysis_loop, 'AI', {cores[1]})
+            server_cores = set(cores[2:])
+        else:
+            print(f"Not pinning threads: only {len(cores)} CPU cores available")
+
     # Start frame capture thread
     capture_thread = threading.Thread(
-        target=capture_frames,
-        args=(device, args.width, args.height, args.fps),
+        target=capture_target,
+        args=(device, args.width, args.height, args.fps, args.max_encode_fps, args.shm,
+              args.nvjpeg),
         daemon=True
     )
     capture_thread.start()
@@ -844,22 +1391,26 @@ def main():
     # Start AI analysis thread (if enabled)
     if ai_enabled:
         ai_thread = threading.Thread(
-            target=ai_analysis_loop,
+            target=ai_target,
             daemon=True
         )
         ai_thread.start()
 
-    # Wait for camera to initialize
-    time.sleep(3)
+    # Wait (up to 3s) for the camera to deliver its first frame
+    with frame_cv:
+        frame_cv.wait_for(lambda: latest_jpeg, timeout=3)
 
     # Check if we got any frames
-    with lock:
-        if output_frame is None:
-            print("\nWarning: No frames captured yet. Check camera output above.")
+    if not latest_jpeg:
+        print("\nWarning: No frames captured yet. Check camera output above.")
 
     # Get local IP for display
     local_ip = get_local_ip()
 
+    # Handler threads inherit the main thread's affinity
+    if server_cores:
+        pin_current_thread('HTTP server', server_cores)
+
     # Start HTTP server
     server = ThreadedHTTPServer(('0.0.0.0', args.port), StreamHandler)
 
@@ -872,6 +1423,9 @@ def main():
     print(f"    http://{local_ip}:{args.port}/video_feed")
     print(f"\n  AI Analysis API:")
     print(f"    http://{local_ip}:{args.port}/analysis")
+    if shared_frame is not None:
+        print(f"\n  Shared Memory Frames:")
+        print(f"    {shared_frame.name} (details: http://{local_ip}:{args.port}/shm)")
     print(f"\n  AI Status: {'Enabled' if ai_enabled else 'Disabled'}")
     if ai_enabled:
         print(f"  AI Model: {AI_CONFIG['model']}")
@@ -885,6 +1439,8 @@ def main():
         print("\nShutting down...")
         if camera is not None:
             camera.release()
+        if shared_frame is not None:
+            shared_frame.close()
         server.shutdown()
 
 
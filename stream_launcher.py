@@ -4,10 +4,12 @@ Interactive Stream Launcher for Jetson Camera
 Navigate with arrow keys, Enter to select, and start the stream with your preferred settings.
 """
 
+import argparse
 import curses
 import os
-import subprocess
 import sys
+import threading
+import time
 
 # Available options
 RESOLUTIONS = [
@@ -38,25 +40,33 @@ PORTS = [
     ("3000", 3000),
 ]
 
+BUTTON_TEXT = "  [ START STREAM ]  "
+
+# Seconds a device gets to open and deliver a frame during detection
+PROBE_TIMEOUT = 3.0
+
 
 class StreamLauncher:
     def __init__(self, stdscr):
         self.stdscr = stdscr
         self.current_menu = 0  # 0=resolution, 1=fps, 2=quality, 3=port, 4=start
-        self.selections = {
-            'resolution': 2,  # Default: 720p
-            'fps': 1,         # Default: 30 FPS
-            'quality': 1,     # Default: Medium
-            'port': 0,        # Default: 8080
-        }
-        self.menus = ['resolution', 'fps', 'quality', 'port', 'start']
-        self.menu_options = {
-            'resolution': RESOLUTIONS,
-            'fps': FRAMERATES,
-            'quality': QUALITY,
-            'port': PORTS,
-        }
+
+        # Menu data as parallel lists indexed by menu number
+        self.menu_options = [RESOLUTIONS, FRAMERATES, QUALITY, PORTS]
+        self.menu_titles = ["RESOLUTION", "FRAME RATE", "QUALITY", "PORT"]
+        self.selections = [
+            2,  # Default: 720p
+            1,  # Default: 30 FPS
+            1,  # Default: Medium
+            0,  # Default: 8080
+        ]
+        # Option labels, and the unselected lines indented to line up with
+        # the "  > " marker. Every option is a (label, *values) tuple.
+        self.option_labels = [[opt[0] for opt in options] for options in self.menu_options]
+        self.option_lines = [["    " + label for label in labels] for labels in self.option_labels]
         self.detected_device = None
+        self.detect_thread = None
+        self.probe_threads = []
 
         # Colors
         curses.start_color()
@@ -68,167 +78,247 @@ class StreamLauncher:
         curses.init_pair(5, curses.COLOR_BLACK, curses.COLOR_GREEN)  # Button
         curses.init_pair(6, curses.COLOR_RED, -1)     # Warning
 
+        # Attributes are built once rather than on every draw call
+        self.attr_selected = curses.color_pair(1)
+        self.attr_selected_bold = curses.color_pair(1) | curses.A_BOLD
+        self.attr_header = curses.color_pair(2) | curses.A_BOLD
+        self.attr_normal = curses.color_pair(4)
+        self.attr_button = curses.color_pair(5) | curses.A_BOLD
+        self.attr_warning = curses.color_pair(6)
+
         curses.curs_set(0)  # Hide cursor
         self.stdscr.keypad(True)
+        # Wake up every 50 ms without a key so background updates get drawn
+        self.stdscr.timeout(50)
+
+        # One subwindow per part of the UI that changes, so a keypress only
+        # redraws (and sends to the terminal) the parts it affected. Menu
+        # windows are marked dirty by menu number, the others by name.
+        self.menu_wins = []
+        self.wins = {}
+        self.dirty = set()
+        self.layout()
+
+    def probe_device(self, cv2, device):
+        """Return the device if it opens and delivers an MJPEG frame."""
+        try:
+            cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+            if cap.isOpened():
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                ret, frame = cap.read()
+                cap.release()
+                if ret and frame is not None:
+                    return device
+        except:
+            pass
+        return None
 
     def detect_camera(self):
         """Detect camera device."""
-        import glob
+        # Numeric order, so /dev/video10 comes after /dev/video2
+        video_devices = sorted(
+            (entry.path for entry in os.scandir('/dev')
+             if entry.name.startswith('video') and entry.name[5:].isdigit()),
+            key=lambda path: int(path[len('/dev/video'):])
+        )
+        if not video_devices:
+            return None
+
+        # Importing OpenCV takes seconds on a Jetson, so only pay for it
+        # once there is something to probe
         import cv2
 
-        video_devices = sorted(glob.glob('/dev/video*'))
-        for device in video_devices:
-            try:
-                cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
-                if cap.isOpened():
-                    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
-                    ret, frame = cap.read()
-                    cap.release()
-                    if ret and frame is not None:
-                        return device
-            except:
-                pass
+        # Opening a device and waiting for its first frame can take about a
+        # second, so probe all of them at once. Results are still checked in
+        # device order, so the same device wins as with a serial scan, but a
+        # probe still running at the shared deadline counts as a failure.
+        deadline = time.monotonic() + PROBE_TIMEOUT
+        results = [None] * len(video_devices)
+
+        def probe(i, device):
+            results[i] = self.probe_device(cv2, device)
+
+        threads = [threading.Thread(target=probe, args=(i, device), daemon=True)
+                   for i, device in enumerate(video_devices)]
+        self.probe_threads = threads
+        for thread in threads:
+            thread.start()
+        for i, thread in enumerate(threads):
+            thread.join(max(0, deadline - time.monotonic()))
+            if results[i]:
+                return results[i]
         return None
 
-    def draw_box(self, y, x, h, w, title=""):
-        """Draw a box with optional title."""
-        # Corners
-        self.stdscr.addch(y, x, curses.ACS_ULCORNER)
-        self.stdscr.addch(y, x + w - 1, curses.ACS_URCORNER)
-        self.stdscr.addch(y + h - 1, x, curses.ACS_LLCORNER)
-        self.stdscr.addch(y + h - 1, x + w - 1, curses.ACS_LRCORNER)
+    def wait_for_detection(self, timeout=PROBE_TIMEOUT):
+        """
+        Wait, up to timeout seconds, for detection and every device probe to
+        finish, so no capture is left open when the stream starts.
+        """
+        deadline = time.monotonic() + timeout
+        for thread in [self.detect_thread, *self.probe_threads]:
+            if thread is not None:
+                thread.join(max(0, deadline - time.monotonic()))
+
+    def layout(self):
+        """Create the subwindows for the current terminal size and mark everything for redraw."""
+        h, w = self.stdscr.getmaxyx()
+
+        # Menu columns
+        col_width = (w - 8) // 4
+        self.menu_wins = [
+            curses.newwin(len(options) + 1, col_width, 5, 4 + i * col_width)
+            for i, options in enumerate(self.menu_options)
+        ]
 
-        # Horizontal lines
-        for i in range(1, w - 1):
-            self.stdscr.addch(y, x + i, curses.ACS_HLINE)
-            self.stdscr.addch(y + h - 1, x + i, curses.ACS_HLINE)
+        # Status lines and start button
+        self.wins['config'] = curses.newwin(1, w - 8, 16, 4)
+        self.wins['camera'] = curses.newwin(1, w - 8, 17, 4)
+        self.wins['button'] = curses.newwin(1, len(BUTTON_TEXT) + 1, 19, (w - len(BUTTON_TEXT)) // 2)
 
-        # Vertical lines
-        for i in range(1, h - 1):
-            self.stdscr.addch(y + i, x, curses.ACS_VLINE)
-            self.stdscr.addch(y + i, x + w - 1, curses.ACS_VLINE)
+        self.dirty = {'chrome', *range(len(self.menu_wins)), *self.wins}
 
-        # Title
-        if title:
-            self.stdscr.addstr(y, x + 2, f" {title} ", curses.color_pair(2) | curses.A_BOLD)
+    def mark(self, menu_idx):
+        """Mark the window of a menu (or the start button) for redraw."""
+        self.dirty.add('button' if menu_idx == 4 else menu_idx)
+
+    def focus(self, menu_idx):
+        """Move focus to another menu."""
+        self.mark(self.current_menu)
+        self.current_menu = menu_idx
+        self.mark(menu_idx)
+
+    def select(self, menu_idx, option_idx):
+        """Select an option, redrawing its menu and the summary only if it changed."""
+        if option_idx != self.selections[menu_idx]:
+            self.selections[menu_idx] = option_idx
+            self.dirty.update((menu_idx, 'config'))
 
-    def draw_menu_section(self, y, x, title, options, selected_idx, is_active):
+    def put(self, win, y, x, text, attr=0):
+        """Write text into a window, clipped to its width."""
+        width = win.getmaxyx()[1] - x - 1
+        if width > 0:
+            win.addnstr(y, x, text, width, attr)
+
+    def draw_menu_section(self, win, menu_idx, is_active):
         """Draw a menu section with options."""
-        color = curses.color_pair(3) if is_active else curses.color_pair(4)
-        title_color = curses.color_pair(2) | curses.A_BOLD if is_active else curses.color_pair(4)
+        selected_idx = self.selections[menu_idx]
+        option_lines = self.option_lines[menu_idx]
+        title_color = self.attr_header if is_active else self.attr_normal
 
-        self.stdscr.addstr(y, x, title, title_color)
+        self.put(win, 0, 0, self.menu_titles[menu_idx], title_color)
 
-        for i, opt in enumerate(options):
-            opt_y = y + 1 + i
-            label = opt[0] if isinstance(opt, tuple) else opt
+        for i, label in enumerate(self.option_labels[menu_idx]):
+            opt_y = 1 + i
 
             if i == selected_idx:
                 if is_active:
-                    self.stdscr.addstr(opt_y, x, "  > ", curses.color_pair(1) | curses.A_BOLD)
-                    self.stdscr.addstr(opt_y, x + 4, label, curses.color_pair(1) | curses.A_BOLD)
+                    self.put(win, opt_y, 0, "  > ", self.attr_selected_bold)
+                    self.put(win, opt_y, 4, label, self.attr_selected_bold)
                 else:
-                    self.stdscr.addstr(opt_y, x, "  * ", curses.color_pair(1))
-                    self.stdscr.addstr(opt_y, x + 4, label, curses.color_pair(1))
+                    self.put(win, opt_y, 0, "  * ", self.attr_selected)
+                    self.put(win, opt_y, 4, label, self.attr_selected)
             else:
-                self.stdscr.addstr(opt_y, x, "    " + label, curses.color_pair(4))
+                self.put(win, opt_y, 0, option_lines[i], self.attr_normal)
 
-    def draw(self):
-        """Draw the entire UI."""
-        self.stdscr.clear()
+    def draw_chrome(self):
+        """Draw the static parts of the UI directly on the screen."""
+        self.stdscr.erase()
         h, w = self.stdscr.getmaxyx()
 
         # Title
         title = "JETSON CAMERA STREAM LAUNCHER"
-        self.stdscr.addstr(1, (w - len(title)) // 2, title, curses.color_pair(1) | curses.A_BOLD)
+        self.stdscr.addstr(1, (w - len(title)) // 2, title, self.attr_selected_bold)
 
         subtitle = "Use Arrow Keys to navigate, Enter to select"
-        self.stdscr.addstr(2, (w - len(subtitle)) // 2, subtitle, curses.color_pair(4))
+        self.stdscr.addstr(2, (w - len(subtitle)) // 2, subtitle, self.attr_normal)
 
         # Draw separator
-        self.stdscr.addstr(3, 2, "─" * (w - 4), curses.color_pair(4))
-
-        # Calculate column positions
-        col_width = (w - 8) // 4
-        col1 = 4
-        col2 = col1 + col_width
-        col3 = col2 + col_width
-        col4 = col3 + col_width
+        self.stdscr.hline(3, 2, curses.ACS_HLINE | self.attr_normal, w - 4)
 
-        # Draw menu sections
-        self.draw_menu_section(5, col1, "RESOLUTION",
-                               RESOLUTIONS, self.selections['resolution'],
-                               self.current_menu == 0)
-
-        self.draw_menu_section(5, col2, "FRAME RATE",
-                               FRAMERATES, self.selections['fps'],
-                               self.current_menu == 1)
-
-        self.draw_menu_section(5, col3, "QUALITY",
-                               QUALITY, self.selections['quality'],
-                               self.current_menu == 2)
+        # Separator
+        self.stdscr.hline(13, 2, curses.ACS_HLINE | self.attr_normal, w - 4)
 
-        self.draw_menu_section(5, col4, "PORT",
-                               PORTS, self.selections['port'],
-                               self.current_menu == 3)
+        self.stdscr.addstr(15, 4, "Current Configuration:", self.attr_header)
 
-        # Separator
-        self.stdscr.addstr(13, 2, "─" * (w - 4), curses.color_pair(4))
+        # Help text
+        help_text = "← → Switch menu | ↑ ↓ Change option | Enter: Start | Q: Quit"
+        self.stdscr.addstr(h - 2, (w - len(help_text)) // 2, help_text, self.attr_normal)
 
-        # Current configuration summary
-        res = RESOLUTIONS[self.selections['resolution']]
-        fps = FRAMERATES[self.selections['fps']]
-        qual = QUALITY[self.selections['quality']]
-        port = PORTS[self.selections['port']]
+    def draw_config(self, win):
+        """Draw the current configuration summary."""
+        res, fps, qual, port = (options[i] for options, i in zip(self.menu_options, self.selections))
 
-        self.stdscr.addstr(15, 4, "Current Configuration:", curses.color_pair(2) | curses.A_BOLD)
         config_str = f"{res[1]}x{res[2]} @ {fps[1]} FPS, Quality: {qual[1]}%, Port: {port[1]}"
-        self.stdscr.addstr(16, 4, config_str, curses.color_pair(1))
+        self.put(win, 0, 0, config_str, self.attr_selected)
 
-        # Camera status
+    def draw_camera(self, win):
+        """Draw the camera detection status."""
         if self.detected_device:
-            self.stdscr.addstr(17, 4, f"Camera: {self.detected_device}", curses.color_pair(1))
+            self.put(win, 0, 0, f"Camera: {self.detected_device}", self.attr_selected)
         else:
-            self.stdscr.addstr(17, 4, "Camera: Scanning...", curses.color_pair(6))
-
-        # Start button
-        button_text = "  [ START STREAM ]  "
-        button_x = (w - len(button_text)) // 2
-        button_y = 19
+            self.put(win, 0, 0, "Camera: Scanning...", self.attr_warning)
 
+    def draw_button(self, win):
+        """Draw the start button."""
         if self.current_menu == 4:
-            self.stdscr.addstr(button_y, button_x, button_text, curses.color_pair(5) | curses.A_BOLD)
+            self.put(win, 0, 0, BUTTON_TEXT, self.attr_button)
         else:
-            self.stdscr.addstr(button_y, button_x, button_text, curses.color_pair(1))
+            self.put(win, 0, 0, BUTTON_TEXT, self.attr_selected)
 
-        # Help text
-        help_text = "← → Switch menu | ↑ ↓ Change option | Enter: Start | Q: Quit"
-        self.stdscr.addstr(h - 2, (w - len(help_text)) // 2, help_text, curses.color_pair(4))
-
-        self.stdscr.refresh()
+    def draw(self):
+        """Redraw the windows that changed and update the terminal in one go."""
+        if 'chrome' in self.dirty:
+            self.draw_chrome()
+            self.stdscr.noutrefresh()
+
+        for i, win in enumerate(self.menu_wins):
+            if i in self.dirty:
+                win.erase()
+                self.draw_menu_section(win, i, i == self.current_menu)
+                win.noutrefresh()
+
+        for name, win in self.wins.items():
+            if name not in self.dirty:
+                continue
+            win.erase()
+            if name == 'config':
+                self.draw_config(win)
+            elif name == 'camera':
+                self.draw_camera(win)
+            elif name == 'button':
+                self.draw_button(win)
+            win.noutrefresh()
+
+        self.dirty.clear()
+        curses.doupdate()
 
     def handle_input(self, key):
         """Handle keyboard input."""
         if key == curses.KEY_LEFT:
-            self.current_menu = max(0, self.current_menu - 1)
+            self.focus(max(0, self.current_menu - 1))
         elif key == curses.KEY_RIGHT:
-            self.current_menu = min(4, self.current_menu + 1)
+            self.focus(min(4, self.current_menu + 1))
         elif key == curses.KEY_UP:
             if self.current_menu < 4:
-                menu_name = self.menus[self.current_menu]
-                options = self.menu_options[menu_name]
-                self.selections[menu_name] = max(0, self.selections[menu_name] - 1)
+                menu_idx = self.current_menu
+                self.select(menu_idx, max(0, self.selections[menu_idx] - 1))
         elif key == curses.KEY_DOWN:
             if self.current_menu < 4:
-                menu_name = self.menus[self.current_menu]
-                options = self.menu_options[menu_name]
-                self.selections[menu_name] = min(len(options) - 1, self.selections[menu_name] + 1)
+                menu_idx = self.current_menu
+                options = self.menu_options[menu_idx]
+                self.select(menu_idx, min(len(options) - 1, self.selections[menu_idx] + 1))
         elif key == ord('\n') or key == curses.KEY_ENTER or key == 10:
             if self.current_menu == 4:
                 return 'start'
             else:
                 # Move to next menu on Enter
-                self.current_menu = min(4, self.current_menu + 1)
+                self.focus(min(4, self.current_menu + 1))
+        elif key == curses.KEY_RESIZE:
+            # The static text is only drawn with a new layout, so rebuild it
+            # and repaint the whole terminal
+            self.stdscr.clear()
+            self.layout()
         elif key == ord('q') or key == ord('Q'):
             return 'quit'
         elif key == ord('s') or key == ord('S'):
@@ -238,9 +328,9 @@ class StreamLauncher:
 
     def get_stream_command(self):
         """Build the command to start the stream."""
-        res = RESOLUTIONS[self.selections['resolution']]
-        fps = FRAMERATES[self.selections['fps']]
-        port = PORTS[self.selections['port']]
+        res = RESOLUTIONS[self.selections[0]]
+        fps = FRAMERATES[self.selections[1]]
+        port = PORTS[self.selections[3]]
 
         script_dir = os.path.dirname(os.path.abspath(__file__))
         cmd = [
@@ -260,21 +350,38 @@ class StreamLauncher:
     def run(self):
         """Main loop."""
         # Start camera detection in background
-        import threading
         def detect():
             self.detected_device = self.detect_camera()
 
-        detect_thread = threading.Thread(target=detect, daemon=True)
-        detect_thread.start()
+        self.detect_thread = threading.Thread(target=detect, daemon=True)
+        self.detect_thread.start()
 
+        shown_device = None
         while True:
-            self.draw()
+            # Detection runs in the background, show its result once it lands
+            if self.detected_device != shown_device:
+                shown_device = self.detected_device
+                self.dirty.add('camera')
+            if self.dirty:
+                self.draw()
+
             key = self.stdscr.getch()
+            if key == -1:
+                continue  # No key within the timeout
             result = self.handle_input(key)
 
             if result == 'quit':
                 return None
             elif result == 'start':
+                # Probes still running hold V4L2 fds that would otherwise be
+                # passed on to the stream and keep the camera busy
+                if any(thread.is_alive() for thread in [self.detect_thread, *self.probe_threads]):
+                    win = self.wins['camera']
+                    win.erase()
+                    self.put(win, 0, 0, "Camera: Finishing scan...", self.attr_warning)
+                    win.noutrefresh()
+                    curses.doupdate()
+                    self.wait_for_detection()
                 return self.get_stream_command()
 
 
@@ -288,7 +395,40 @@ def show_starting_message(cmd):
     print("=" * 50 + "\n")
 
 
+def close_fds_on_exec():
+    """Mark every fd above stderr close-on-exec, as subprocess's close_fds does."""
+    for name in os.listdir('/proc/self/fd'):
+        fd = int(name)
+        if fd > 2:
+            try:
+                os.set_inheritable(fd, False)
+            except OSError:
+                pass  # The fd listdir used, already closed
+
+
+def run_stream(cmd):
+    """Run the stream as a child process and wait for it to exit."""
+    # posix_spawn avoids fork() duplicating the launcher's address space,
+    # which is large once OpenCV has been loaded for camera detection. Unlike
+    # subprocess it passes on every inheritable fd, so close those first.
+    sys.stdout.flush()
+    close_fds_on_exec()
+    pid = os.posix_spawnp(cmd[0], cmd, os.environ)
+    while True:
+        try:
+            os.waitpid(pid, 0)
+            return
+        except KeyboardInterrupt:
+            # The stream got the Ctrl+C too; let it finish shutting down
+            continue
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Interactive Stream Launcher for Jetson Camera')
+    parser.add_argument('--keep-launcher', action='store_true',
+                        help='Run the stream as a child process instead of replacing the launcher')
+    args = parser.parse_args()
+
     # Check if running in a terminal
     if not sys.stdin.isatty():
         print("Error: This script requires an interactive terminal")
@@ -300,8 +440,15 @@ def main():
 
         if cmd:
             show_starting_message(cmd)
-            # Execute the stream command
-            subprocess.run(cmd)
+            if args.keep_launcher:
+                run_stream(cmd)
+            else:
+                # Replace the launcher with the stream, so the memory held by
+                # curses and OpenCV goes to the video pipeline instead. A probe
+                # stuck past the detection wait must not hand its camera fd on.
+                sys.stdout.flush()
+                close_fds_on_exec()
+                os.execvp(cmd[0], cmd)
         else:
             print("\nStream cancelled.")
 